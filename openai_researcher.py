@@ -1,11 +1,88 @@
 import asyncio
 import streamlit as st
-from typing import Dict, Any, List
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Dict, Any, AsyncIterator, Iterator, List, Tuple
 from agents import Agent, Runner
 from agents import set_default_openai_key
 from agents.tool import function_tool, WebSearchTool
 from crawl4ai import AsyncWebCrawler
+from collections import OrderedDict
+from itertools import islice
+from urllib.parse import urlparse
+import aiohttp
+import io
 import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Errors raised while streaming a malformed JSON payload
+_STREAM_ERRORS = (ijson.JSONError,) if ijson is not None else ()
+
+# Maximum number of pages crawled concurrently per session, across all tools
+CRAWL_CONCURRENCY = 8
+
+# A session's event loop, crawler and HTTP session are shut down after this
+# many seconds without a research run
+SESSION_IDLE_TIMEOUT = 900
+_IDLE_CHECK_INTERVAL = 60
+
+# Successful crawls are reused across research angles for this many seconds
+CRAWL_CACHE_TTL = 600
+CRAWL_CACHE_MAX_ENTRIES = 256
+
+# Low-signal hosts (social feeds, login walls) that are never worth crawling;
+# subdomains of these are skipped too
+_DENY_HOSTS = frozenset({
+    'twitter.com', 'x.com', 'linkedin.com', 'facebook.com', 'instagram.com',
+    'tiktok.com', 'pinterest.com', 't.co', 'lnkd.in',
+})
+
+# Content types Crawl4AI can extract text from
+_TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+# Crawled pages larger than this are written to disk and returned to the
+# agent as a preview plus the file path, readable with read_crawled_page
+CONTENT_SPILL_THRESHOLD = 64_000
+CONTENT_PREVIEW_CHARS = 4_000
+CONTENT_READ_MAX_CHARS = 32_000
+
+# Matches http(s) URLs in plain-text search results
+_URL_RE = re.compile(r'https?://[^\s<>"\'\]\[(){}]+')
+
+# Characters that are unsafe in a suggested download filename
+_FILENAME_TABLE = str.maketrans({c: '_' for c in ' /\\:*?"<>|\t\n'})
+
+# Sections longer than this are sent to the elaboration agent as a skeleton;
+# reports are elaborated a "## " section at a time, so this is per section
+ELABORATION_SKELETON_THRESHOLD = 2_000
+
+# Boundary between sentences within a line of prose
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Any markdown heading line
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)$', re.M)
+
+# Start of a top-level section in the research agent's markdown report
+_SECTION_RE = re.compile(r'^## ', re.M)
+
+# Opening or closing line of a fenced code block
+_FENCE_RE = re.compile(r'^[ \t]*(?:```|~~~)[^\n]*$', re.M)
+
+# Maximum number of report sections elaborated at once
+ELABORATION_CONCURRENCY = 3
 
 # Set page configuration
 st.set_page_config(
@@ -43,9 +120,334 @@ research_topic = st.text_input(
     placeholder="e.g., Latest developments in AI"
 )
 
+def _dumps(obj: Any) -> str:
+    """
+    Serialize a tool result to JSON. The Agents SDK sends non-string tool
+    output to the model via str(), so large results are pre-encoded here,
+    with orjson when available.
+    """
+    if _json is json:
+        return json.dumps(obj, ensure_ascii=False)
+    return _json.dumps(obj).decode()
+
+@st.cache_resource
+def _crawl_cache() -> Tuple["OrderedDict[str, Tuple[float, Dict[str, Any]]]", threading.Lock]:
+    """
+    Process-wide LRU of crawled pages keyed by URL, kept across reruns. Every
+    session's event loop thread shares it, so it comes with its own lock.
+    """
+    return OrderedDict(), threading.Lock()
+
+def _discard_spilled(items: List[Dict[str, Any]]):
+    """Delete the on-disk bodies of crawl results leaving the cache."""
+    for item in items:
+        if "content_path" in item:
+            try:
+                os.remove(item["content_path"])
+            except FileNotFoundError:
+                pass
+
+def _get_cached_crawl(url: str):
+    cache, lock = _crawl_cache()
+    with lock:
+        hit = cache.get(url)
+        if hit is None:
+            return None
+        if time.time() - hit[0] >= CRAWL_CACHE_TTL:
+            del cache[url]
+            expired = True
+        else:
+            cache.move_to_end(url)
+            expired = False
+    if expired:
+        _discard_spilled([hit[1]])
+        return None
+    return dict(hit[1])
+
+def _store_cached_crawl(url: str, item: Dict[str, Any]):
+    cache, lock = _crawl_cache()
+    evicted = []
+    with lock:
+        previous = cache.get(url)
+        if previous is not None and previous[1] is not item:
+            evicted.append(previous[1])
+        cache[url] = (time.time(), item)
+        cache.move_to_end(url)
+        while len(cache) > CRAWL_CACHE_MAX_ENTRIES:
+            evicted.append(cache.popitem(last=False)[1][1])
+    _discard_spilled(evicted)
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    loop.run_forever()
+    loop.close()
+
+def _new_session_runtime() -> Dict[str, Any]:
+    loop = asyncio.new_event_loop()
+    runtime = {
+        "loop": loop,
+        "thread": threading.Thread(target=_run_loop, args=(loop,), daemon=True),
+        "lock": threading.Lock(),
+        # key -> (startup task, async close function or None)
+        "resources": {},
+        "active": 0,
+        "last_used": time.time(),
+        "closed": False,
+    }
+    runtime["thread"].start()
+    asyncio.run_coroutine_threadsafe(_reap_when_idle(runtime), loop)
+    return runtime
+
+def _acquire_session_runtime() -> Dict[str, Any]:
+    """
+    Event loop kept alive for the browser session, so the crawler and its
+    connection pools survive between research runs. Marks the runtime busy;
+    callers release it with _release_session_runtime.
+    """
+    while True:
+        runtime = st.session_state.get("_runtime")
+        if runtime is None or runtime["closed"]:
+            runtime = st.session_state._runtime = _new_session_runtime()
+        with runtime["lock"]:
+            # The idle reaper may have closed it since the check above
+            if not runtime["closed"]:
+                runtime["active"] += 1
+                return runtime
+
+def _release_session_runtime(runtime: Dict[str, Any]):
+    with runtime["lock"]:
+        runtime["active"] -= 1
+        runtime["last_used"] = time.time()
+
+async def _reap_when_idle(runtime: Dict[str, Any]):
+    """
+    Streamlit has no session-end hook, so a session's loop tears itself down
+    once nothing has used it for SESSION_IDLE_TIMEOUT seconds.
+    """
+    while True:
+        await asyncio.sleep(_IDLE_CHECK_INTERVAL)
+        with runtime["lock"]:
+            idle = time.time() - runtime["last_used"]
+            if not runtime["active"] and idle >= SESSION_IDLE_TIMEOUT:
+                runtime["closed"] = True
+                break
+    
+    for task, close in runtime["resources"].values():
+        if (close is not None and task.done() and not task.cancelled()
+                and task.exception() is None):
+            try:
+                await close(task.result())
+            except Exception:
+                pass
+    
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    asyncio.get_running_loop().stop()
+
+def iter_in_session_loop(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """Drive an async generator on the session's event loop from the script thread."""
+    runtime = _acquire_session_runtime()
+    loop = runtime["loop"]
+    # Let Streamlit calls made on the loop thread render into the current run
+    add_script_run_ctx(runtime["thread"], get_script_run_ctx())
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Reached early when the stream is abandoned (rerun, stop, error);
+        # closing the generator lets it cancel its outstanding work
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop)
+        _release_session_runtime(runtime)
+
+async def _start_crawler() -> AsyncWebCrawler:
+    crawler = AsyncWebCrawler(verbose=True)
+    await crawler.__aenter__()
+    return crawler
+
+async def _close_crawler(crawler: AsyncWebCrawler):
+    await crawler.__aexit__(None, None, None)
+
+async def _session_resource(key: str, start, close=None):
+    """
+    Start a resource once per session on the session's event loop; close is
+    awaited with it when the session's loop is torn down.
+    """
+    resources = st.session_state._runtime["resources"]
+    task = resources[key][0] if key in resources else None
+    if task is None or (task.done() and (task.cancelled() or task.exception())):
+        # Store the task itself so concurrent tool calls share one startup
+        task = asyncio.ensure_future(start())
+        resources[key] = (task, close)
+    return await task
+
+async def _get_crawler() -> AsyncWebCrawler:
+    return await _session_resource("crawler", _start_crawler, _close_crawler)
+
+async def _start_http_session() -> aiohttp.ClientSession:
+    # Keep-alive pool with cached DNS, so preflights to a host reuse one
+    # TLS connection across every crawl in the session
+    connector = aiohttp.TCPConnector(
+        limit=50,
+        limit_per_host=4,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=5)
+    )
+
+async def _close_http_session(session: aiohttp.ClientSession):
+    await session.close()
+
+async def _get_http_session() -> aiohttp.ClientSession:
+    return await _session_resource(
+        "http_session", _start_http_session, _close_http_session
+    )
+
+async def _start_crawl_semaphore() -> asyncio.Semaphore:
+    return asyncio.Semaphore(CRAWL_CONCURRENCY)
+
+async def _get_crawl_semaphore() -> asyncio.Semaphore:
+    """
+    One bound on in-flight crawls for the whole session, so parallel tool
+    calls can't open more pages than that in the shared browser.
+    """
+    return await _session_resource("crawl_semaphore", _start_crawl_semaphore)
+
+def _is_denied(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    labels = host.split(".")
+    return any(".".join(labels[i:]) in _DENY_HOSTS for i in range(len(labels)))
+
+async def _is_text_page(url: str) -> bool:
+    """HEAD preflight so PDFs, images and downloads never reach Crawl4AI."""
+    try:
+        session = await _get_http_session()
+        async with session.head(url, allow_redirects=True) as response:
+            # An error response's Content-Type describes the error body,
+            # not the page a GET would return
+            if not 200 <= response.status < 300:
+                return True
+            content_type = response.headers.get("Content-Type", "").lower()
+    except Exception:
+        # Plenty of servers reject HEAD; let the crawler decide
+        return True
+    return not content_type or content_type.startswith(_TEXT_CONTENT_TYPES)
+
+@st.cache_resource
+def _spill_dir() -> str:
+    return tempfile.mkdtemp(prefix="open-researcher-")
+
+def _spill_content(content: str, directory: str) -> str:
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".md", dir=directory, delete=False, encoding="utf-8"
+    ) as f:
+        f.write(content)
+    return f.name
+
+async def _fetch_page(url: str) -> Dict[str, Any]:
+    try:
+        crawler = await _get_crawler()
+        async with await _get_crawl_semaphore():
+            if not await _is_text_page(url):
+                return {
+                    "url": url,
+                    "error": "Skipped non-text content",
+                    "success": False
+                }
+            
+            result = await crawler.arun(
+                url=url,
+                word_count_threshold=100,  # Only extract substantial content
+                bypass_cache=False  # Let Crawl4AI's disk cache serve cold misses
+            )
+        
+        if result.success:
+            content = result.cleaned_html or result.markdown or ""
+            item = {
+                "url": url,
+                "title": result.metadata.get("title", ""),
+                "content": content,
+                # Approximate: separator counts run in C with no
+                # per-token allocations
+                "word_count": (
+                    content.count(' ') + content.count('\n') + 1
+                ) if content else 0,
+                "success": True
+            }
+            if len(content) > CONTENT_SPILL_THRESHOLD:
+                # Keep large bodies out of memory and the tool response
+                item["content_path"] = await asyncio.to_thread(
+                    _spill_content, content, _spill_dir()
+                )
+                item["content"] = content[:CONTENT_PREVIEW_CHARS] + "…"
+            _store_cached_crawl(url, item)
+            return item
+        
+        return {
+            "url": url,
+            "error": "Failed to crawl",
+            "success": False
+        }
+            
+    except Exception as e:
+        return {
+            "url": url,
+            "error": str(e),
+            "success": False
+        }
+
+async def _cached_crawl(url: str) -> Dict[str, Any]:
+    item = _get_cached_crawl(url)
+    if item is None:
+        item = await _fetch_page(url)
+    return item
+
+def _crawl_page(url: str) -> "asyncio.Future[Dict[str, Any]]":
+    """
+    Crawl a page at most once per research run; later tool calls asking for
+    the same URL share the first call's result. Await it through
+    asyncio.shield so one cancelled caller can't cancel it for the others.
+    """
+    run_crawls = st.session_state.setdefault("_run_crawls", {})
+    task = run_crawls.get(url)
+    if task is None:
+        task = run_crawls[url] = asyncio.ensure_future(_cached_crawl(url))
+    return task
+
+def _crawl_summary(urls: List[str], results: List[Any]) -> Dict[str, Any]:
+    crawled_content = [
+        item if not isinstance(item, BaseException)
+        else {"url": url, "error": str(item), "success": False}
+        for url, item in zip(urls, results)
+    ]
+    
+    failed_crawls = [item for item in crawled_content if not item.get("success")]
+    if failed_crawls:
+        with st.expander(f"Failures ({len(failed_crawls)})"):
+            for item in failed_crawls:
+                st.write(f"❌ {item['url']}: {item['error']}")
+    
+    successful_crawls = [item for item in crawled_content if item.get("success")]
+    
+    return {
+        "success": True,
+        "total_urls_attempted": len(urls),
+        "successful_crawls": len(successful_crawls),
+        "crawled_content": crawled_content,
+        "summary": (
+            f"Successfully crawled {len(successful_crawls)} out of "
+            f"{len(urls)} URLs"
+        )
+    }
+
 # Web crawling tool using Crawl4AI
 @function_tool
-async def crawl_urls(urls: List[str], max_urls: int = 10) -> Dict[str, Any]:
+async def crawl_urls(urls: List[str], max_urls: int = 10) -> str:
     """
     Crawl multiple URLs and extract their content using Crawl4AI.
     
@@ -54,67 +456,165 @@ async def crawl_urls(urls: List[str], max_urls: int = 10) -> Dict[str, Any]:
         max_urls: Maximum number of URLs to crawl (default: 10)
     """
     try:
-        # Limit the number of URLs to crawl
-        urls_to_crawl = urls[:max_urls]
+        # Drop duplicate and low-signal URLs, then limit the number to crawl
+        urls_to_crawl = [
+            url for url in dict.fromkeys(urls) if not _is_denied(url)
+        ][:max_urls]
+        total = len(urls_to_crawl)
         
-        crawled_content = []
+        done = 0
         
-        async with AsyncWebCrawler(verbose=True) as crawler:
-            for i, url in enumerate(urls_to_crawl):
-                try:
-                    st.write(
-                        f"🔍 Crawling URL {i+1}/{len(urls_to_crawl)}: {url}"
-                    )
-                    
-                    result = await crawler.arun(
-                        url=url,
-                        word_count_threshold=100,  # Only extract substantial content
-                        bypass_cache=True
-                    )
-                    
-                    if result.success:
-                        content = result.cleaned_html or result.markdown
-                        crawled_content.append({
-                            "url": url,
-                            "title": result.metadata.get("title", ""),
-                            "content": content,
-                            "word_count": len((content or "").split()),
-                            "success": True
-                        })
-                        title = result.metadata.get('title', url)
-                        st.write(f"✅ Successfully crawled: {title}")
-                    else:
-                        crawled_content.append({
-                            "url": url,
-                            "error": "Failed to crawl",
-                            "success": False
-                        })
-                        st.write(f"❌ Failed to crawl: {url}")
-                        
-                except Exception as e:
-                    crawled_content.append({
-                        "url": url,
-                        "error": str(e),
-                        "success": False
-                    })
-                    st.write(f"❌ Error crawling {url}: {str(e)}")
+        # A single progress bar keeps UI updates off the crawl hot path
+        progress_bar = st.progress(0)
+        status = st.empty()
         
-        successful_crawls = [item for item in crawled_content if item.get("success")]
+        async def _one(url: str) -> Dict[str, Any]:
+            nonlocal done
+            # Shielded: cancelling this call must not cancel the shared crawl
+            item = await asyncio.shield(_crawl_page(url))
+            
+            # All tasks share the event loop thread, so this is race-free
+            done += 1
+            status.text(f"🔍 Crawled {done}/{total}: {url[:60]}")
+            progress_bar.progress(done / total)
+            return item
         
-        return {
-            "success": True,
-            "total_urls_attempted": len(urls_to_crawl),
-            "successful_crawls": len(successful_crawls),
-            "crawled_content": crawled_content,
-            "summary": (
-                f"Successfully crawled {len(successful_crawls)} out of "
-                f"{len(urls_to_crawl)} URLs"
-            )
-        }
+        results = await asyncio.gather(
+            *[_one(url) for url in urls_to_crawl],
+            return_exceptions=True
+        )
+        
+        return _dumps(_crawl_summary(urls_to_crawl, results))
         
     except Exception as e:
         st.error(f"Crawling error: {str(e)}")
-        return {"error": str(e), "success": False}
+        return _dumps({"error": str(e), "success": False})
+
+# Fused search + crawl tool, so crawling starts while search results stream in
+@function_tool
+async def search_and_crawl(query: str, max_urls: int = 6) -> str:
+    """
+    Search the web for a query and crawl the top results in one step.
+    
+    Args:
+        query: Specific, targeted search query
+        max_urls: Maximum number of result URLs to crawl (default: 6)
+    """
+    try:
+        crawls: Dict[str, asyncio.Future] = {}
+        status = st.empty()
+        status.text(f"🔎 Searching: {query[:60]}")
+        
+        def _schedule(text: str, pos: int, final: bool) -> int:
+            """Start crawling every complete URL in text[pos:]; return where to resume."""
+            for match in _URL_RE.finditer(text, pos):
+                if not final and match.end() == len(text):
+                    # The URL may still be streaming in
+                    break
+                pos = match.end()
+                url = match.group(0).rstrip('.,;:)]}')
+                if (url not in crawls and len(crawls) < max_urls
+                        and not _is_denied(url)):
+                    crawls[url] = _crawl_page(url)
+                    status.text(f"🔍 Crawling {len(crawls)}: {url[:60]}")
+            return pos
+        
+        search = Runner.run_streamed(get_search_agent(), query)
+        text, pos = "", 0
+        async for event in search.stream_events():
+            if (event.type == "raw_response_event"
+                    and event.data.type == "response.output_text.delta"):
+                text += event.data.delta
+                pos = _schedule(text, pos, final=False)
+        _schedule(text, pos, final=True)
+        
+        results = await asyncio.gather(
+            *[asyncio.shield(crawl) for crawl in crawls.values()],
+            return_exceptions=True
+        )
+        status.text(f"✅ Crawled {len(crawls)} sources for: {query[:60]}")
+        
+        summary = _crawl_summary(list(crawls), results)
+        summary["search_results"] = search.final_output
+        return _dumps(summary)
+        
+    except Exception as e:
+        st.error(f"Search and crawl error: {str(e)}")
+        return _dumps({"error": str(e), "success": False})
+
+def _read_spilled(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+# Reader for large crawled pages that were spilled to disk
+@function_tool
+async def read_crawled_page(content_path: str, offset: int = 0, length: int = 8000) -> str:
+    """
+    Read more of a large crawled page that was returned as a preview plus content_path.
+    
+    Args:
+        content_path: The content_path returned for the page by crawl_urls or search_and_crawl
+        offset: Character offset to start reading from (default: 0)
+        length: Number of characters to read (default: 8000, at most 32000)
+    """
+    try:
+        # Only files this app spilled may be read
+        path = os.path.realpath(content_path)
+        if os.path.dirname(path) != os.path.realpath(_spill_dir()):
+            return _dumps({"error": "Not a crawled page path", "success": False})
+        
+        content = await asyncio.to_thread(_read_spilled, path)
+        offset = max(offset, 0)
+        chunk = content[offset:offset + max(0, min(length, CONTENT_READ_MAX_CHARS))]
+        end = offset + len(chunk)
+        
+        return _dumps({
+            "success": True,
+            "content_path": content_path,
+            "offset": offset,
+            "content": chunk,
+            "total_chars": len(content),
+            "next_offset": end if end < len(content) else None
+        })
+        
+    except FileNotFoundError:
+        return _dumps({
+            "error": "Page is no longer cached; crawl its URL again",
+            "success": False
+        })
+    except Exception as e:
+        return _dumps({"error": str(e), "success": False})
+
+def _stream_search_results(search_results: str, max_results: int):
+    """
+    Pull the first max_results result objects out of a JSON search payload
+    without building the whole document. Returns None when the payload can't
+    be streamed so the caller falls back to a full parse.
+    """
+    if ijson is None:
+        return None
+    
+    root = search_results.lstrip()[:1]
+    if root == '[':
+        prefix = 'item'
+    elif root == '{':
+        prefix = 'results.item'
+    else:
+        return None
+    
+    items = list(islice(
+        ijson.items(io.BytesIO(search_results.encode()), prefix), max_results
+    ))
+    # An object root without a "results" array is a single result, which the
+    # full parse handles. Without any result objects this may not be JSON at
+    # all (e.g. "[1] Title https://..."), so let the full parse decide.
+    if not any(isinstance(item, dict) for item in items):
+        return None
+    return items
+
+def _result_url(result: Dict[str, Any]):
+    """First non-empty URL field of a structured search result."""
+    return result.get('url') or result.get('link') or result.get('href')
 
 # URL extraction helper tool
 @function_tool  
@@ -134,7 +634,13 @@ async def extract_urls_from_search(search_results: str, max_urls: int = 10) -> L
         # Try to parse as JSON first
         try:
             if isinstance(search_results, str):
-                results_data = json.loads(search_results)
+                # Stream only the leading results instead of the full tree
+                results_data = _stream_search_results(search_results, max_urls)
+                if results_data is None:
+                    # orjson parses bytes directly, skipping a str transcode
+                    results_data = _json.loads(
+                        search_results.encode() if _json is not json else search_results
+                    )
             else:
                 results_data = search_results
                 
@@ -142,8 +648,7 @@ async def extract_urls_from_search(search_results: str, max_urls: int = 10) -> L
             if isinstance(results_data, list):
                 for result in results_data[:max_urls]:
                     if isinstance(result, dict):
-                        url = (result.get('url') or result.get('link') or 
-                               result.get('href'))
+                        url = _result_url(result)
                         if url:
                             urls.append(url)
             elif isinstance(results_data, dict):
@@ -151,151 +656,298 @@ async def extract_urls_from_search(search_results: str, max_urls: int = 10) -> L
                 results_list = results_data.get('results', [results_data])
                 for result in results_list[:max_urls]:
                     if isinstance(result, dict):
-                        url = (result.get('url') or result.get('link') or 
-                               result.get('href'))
+                        url = _result_url(result)
                         if url:
                             urls.append(url)
                             
-        except (json.JSONDecodeError, TypeError):
+        except (json.JSONDecodeError, _json.JSONDecodeError, *_STREAM_ERRORS,
+                TypeError):
             # If not JSON, try to extract URLs using simple string parsing
             # This is a fallback for plain text search results
-            lines = str(search_results).split('\n')
-            for line in lines:
-                if 'http' in line:
-                    # Simple URL extraction - can be improved
-                    words = line.split()
-                    for word in words:
-                        if word.startswith(('http://', 'https://')):
-                            urls.append(word.strip('.,;:()[]{}'))
-                            if len(urls) >= max_urls:
-                                break
+            for match in _URL_RE.finditer(str(search_results)):
+                urls.append(match.group(0).rstrip('.,;:)]}'))
                 if len(urls) >= max_urls:
                     break
         
         # Remove duplicates while preserving order
-        unique_urls = []
-        seen = set()
-        for url in urls:
-            if url not in seen:
-                unique_urls.append(url)
-                seen.add(url)
-        
-        return unique_urls[:max_urls]
+        return list(dict.fromkeys(urls))[:max_urls]
         
     except Exception as e:
         st.error(f"URL extraction error: {str(e)}")
         return []
 
-# Updated research agent with new tools
-research_agent = Agent(
-    name="research_agent",
-    instructions="""You are a research assistant that performs comprehensive, multi-angle research on ANY topic or request.
-
-    Your adaptive workflow:
-    1. ANALYZE THE REQUEST: First understand the nature of the research request:
-       - Is it about a product/service (shopping, comparison, reviews)?
-       - Is it about a market/industry (business, technology, trends)?
-       - Is it about a concept/topic (academic, educational, explanatory)?
-       - Is it about current events (news, developments, updates)?
-       - Is it about a process/how-to (instructions, guides, best practices)?
-       - Is it about a person/organization (biography, background, achievements)?
-       - Or something else entirely?
+@st.cache_resource
+def get_search_agent() -> Agent:
+    """Agent behind search_and_crawl that runs the hosted web search."""
+    return Agent(
+        name="search_agent",
+        instructions="""You find sources on the web for a research query.
+
+        Use web_search to find the most relevant, authoritative sources for the query, then reply with
+        a markdown list of them, best first, one per line in the format:
+        - [Source Title](URL): one-sentence summary of what the source covers
+        
+        Reply with the list only.
+        """,
+        tools=[WebSearchTool()]
+    )
+
+@st.cache_resource
+def get_agents() -> Tuple[Agent, Agent]:
+    """Build the research and elaboration agents once per process."""
+    # Updated research agent with new tools
+    research_agent = Agent(
+        name="research_agent",
+        instructions="""You are a research assistant that performs comprehensive, multi-angle research on ANY topic or request.
+
+        Your adaptive workflow:
+        1. ANALYZE THE REQUEST: First understand the nature of the research request:
+           - Is it about a product/service (shopping, comparison, reviews)?
+           - Is it about a market/industry (business, technology, trends)?
+           - Is it about a concept/topic (academic, educational, explanatory)?
+           - Is it about current events (news, developments, updates)?
+           - Is it about a process/how-to (instructions, guides, best practices)?
+           - Is it about a person/organization (biography, background, achievements)?
+           - Or something else entirely?
        
-    2. DETERMINE RESEARCH ANGLES: Based on the request type, break it into 4-6 relevant angles:
+        2. DETERMINE RESEARCH ANGLES: Based on the request type, break it into 4-6 relevant angles:
        
-       For PRODUCTS/SHOPPING: features, pricing, reviews, alternatives, pros/cons, best use cases
-       For MARKETS/INDUSTRIES: size/trends, key players, technologies, challenges, opportunities, future outlook
-       For CONCEPTS/TOPICS: definition/overview, key aspects, applications, debates, recent developments, implications
-       For CURRENT EVENTS: background, key facts, different perspectives, impact, timeline, future implications
-       For PROCESSES/HOW-TO: overview, step-by-step methods, tools/requirements, best practices, common mistakes, tips
-       For PEOPLE/ORGANIZATIONS: background, achievements, current activities, impact, controversies, future plans
+           For PRODUCTS/SHOPPING: features, pricing, reviews, alternatives, pros/cons, best use cases
+           For MARKETS/INDUSTRIES: size/trends, key players, technologies, challenges, opportunities, future outlook
+           For CONCEPTS/TOPICS: definition/overview, key aspects, applications, debates, recent developments, implications
+           For CURRENT EVENTS: background, key facts, different perspectives, impact, timeline, future implications
+           For PROCESSES/HOW-TO: overview, step-by-step methods, tools/requirements, best practices, common mistakes, tips
+           For PEOPLE/ORGANIZATIONS: background, achievements, current activities, impact, controversies, future plans
        
-    3. RESEARCH EACH ANGLE: For each relevant research angle:
-       - Use web_search with specific, targeted queries tailored to the angle
-       - Extract URLs from search results using extract_urls_from_search
-       - Use crawl_urls to get detailed content from the most relevant sources
-       - Ensure you gather substantial, relevant information for each angle
+        3. RESEARCH EACH ANGLE: For each relevant research angle:
+           - Use search_and_crawl with specific, targeted queries tailored to the angle; it searches
+             and crawls the top sources in a single step
+           - Only fall back to web_search, extract_urls_from_search and crawl_urls when you need
+             content from specific URLs that search_and_crawl did not return
+           - A crawled page that comes back with a content_path only includes a preview of its content;
+             use read_crawled_page with that path to read the rest of it when the page is relevant
+           - Ensure you gather substantial, relevant information for each angle
        
-    4. SYNTHESIZE COMPREHENSIVE REPORT: 
-       - Create a well-structured report using markdown format with clear sections for each research angle
-       - Include specific data, facts, quotes, and examples from sources
-       - Use in-place citations in the format [Source Title](URL) throughout the text
-       - Tailor the depth and style to match the request type
-       - Ensure the report is detailed, substantive, and directly addresses the original request
+        4. SYNTHESIZE COMPREHENSIVE REPORT: 
+           - Create a well-structured report using markdown format with clear sections for each research angle
+           - Include specific data, facts, quotes, and examples from sources
+           - Use in-place citations in the format [Source Title](URL) throughout the text
+           - Tailor the depth and style to match the request type
+           - Ensure the report is detailed, substantive, and directly addresses the original request
        
-    5. QUALITY STANDARDS:
-       - Each section should be substantive with specific details and evidence
-       - Include relevant data, statistics, quotes, or examples when available
-       - Provide concrete information and actionable insights
-       - Use appropriate tone (analytical for business, informative for education, practical for how-to, etc.)
-       - Always cite sources properly with in-place citations
+        5. QUALITY STANDARDS:
+           - Each section should be substantive with specific details and evidence
+           - Include relevant data, statistics, quotes, or examples when available
+           - Provide concrete information and actionable insights
+           - Use appropriate tone (analytical for business, informative for education, practical for how-to, etc.)
+           - Always cite sources properly with in-place citations
     
-    Always adapt your approach based on the specific nature of the research request.
-    """,
-    tools=[WebSearchTool(), extract_urls_from_search, crawl_urls]
-)
+        Always adapt your approach based on the specific nature of the research request.
+        """,
+        tools=[
+            search_and_crawl, WebSearchTool(), extract_urls_from_search, crawl_urls,
+            read_crawled_page
+        ]
+    )
+
+    # Keep the same elaboration agent
+    elaboration_agent = Agent(
+        name="elaboration_agent",
+        instructions="""You are an expert content enhancer specializing in research elaboration.
 
-# Keep the same elaboration agent
-elaboration_agent = Agent(
-    name="elaboration_agent",
-    instructions="""You are an expert content enhancer specializing in research elaboration.
-
-    When given a research report:
-    1. Analyze the structure and content of the report
-    2. Enhance the report by:
-       - Including relevant examples, case studies, and real-world applications
-       - Expanding on key points with additional context and nuance
-       - Adding descriptions of visual elements (charts, diagrams, infographics)
-       - Incorporating latest trends and future predictions
-       - Suggesting practical implications for different stakeholders
-       - Adding proper in-place citations in the format [Source Title](URL)
-       - Maintaining consistent citation format throughout the document
-    3. Maintain academic rigor and factual accuracy
-    4. Preserve the original structure and title - DO NOT change the report title
-    5. Ensure all additions are relevant and valuable to the topic
-    6. Always cite sources properly using in-place citations when adding new information
-    7. Use consistent in-place citation format: [Source Title](URL) or [Author/Organization](URL)
-    8. Do not add "Enhanced Research Report:" or similar prefixes to the title
-    9. Generate the final report in markdown format with proper headers, subheaders, bullet points, etc.
-    10. CRITICAL: Do NOT add AI meta-commentary at the end such as:
-        - "Next Steps" sections
-        - "Conclusion" with AI process mentions
-        - Requests for feedback ("Please let me know...")
-        - Mentions of data collection phases or AI processes
-        - Phrases like "if you need more information" or "let me know if there are specific aspects"
-        - Any requests for further input or interaction
-    11. End the report with substantive content, not meta-commentary
-    12. The enhanced report should be a complete, standalone professional document
+        You are given one section of a research report at a time; the other sections are enhanced
+        separately and joined with yours into the final report.
+        
+        When given a report section:
+        1. Analyze the structure and content of the section
+        2. Enhance the section by:
+           - Including relevant examples, case studies, and real-world applications
+           - Expanding on key points with additional context and nuance
+           - Adding descriptions of visual elements (charts, diagrams, infographics)
+           - Incorporating latest trends and future predictions
+           - Suggesting practical implications for different stakeholders
+           - Adding proper in-place citations in the format [Source Title](URL)
+           - Maintaining consistent citation format throughout the section
+        3. Maintain academic rigor and factual accuracy
+        4. Preserve the section's heading and structure - DO NOT change the heading
+        5. Keep every fact and citation already in the section
+        6. Ensure all additions are relevant and valuable to the topic
+        7. Always cite sources properly using in-place citations when adding new information
+        8. Use consistent in-place citation format: [Source Title](URL) or [Author/Organization](URL)
+        9. Generate the enhanced section in markdown format with proper subheaders, bullet points, etc.
+        10. CRITICAL: Do NOT add AI meta-commentary at the end such as:
+            - "Next Steps" sections
+            - "Conclusion" with AI process mentions
+            - Requests for feedback ("Please let me know...")
+            - Mentions of data collection phases or AI processes
+            - Phrases like "if you need more information" or "let me know if there are specific aspects"
+            - Any requests for further input or interaction
+        11. Do NOT add a report title, "Enhanced Research Report:" prefixes, or an introduction,
+            summary or conclusion for the whole report
+        12. Return only the enhanced section, ending with substantive content
+        """
+    )
+    
+    return research_agent, elaboration_agent
+
+def _fenced_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of every fenced code block; an unclosed fence runs to the end."""
+    marks = list(_FENCE_RE.finditer(text))
+    return [
+        (marks[i].start(), marks[i + 1].end() if i + 1 < len(marks) else len(text))
+        for i in range(0, len(marks), 2)
+    ]
+
+def _unfenced_matches(pattern: "re.Pattern[str]", text: str, pos: int = 0) -> Iterator["re.Match[str]"]:
+    """Matches of pattern in text that fall outside fenced code blocks."""
+    spans = _fenced_spans(text)
+    for match in pattern.finditer(text, pos):
+        if not any(start <= match.start() < end for start, end in spans):
+            yield match
+
+async def _stream_report_sections(research_result) -> AsyncIterator[str]:
     """
-)
+    Yield the research agent's report one "## " section at a time as its
+    text streams in, so each section can be elaborated while the next one
+    is still being written.
+    """
+    buffer = ""
+    async for event in research_result.stream_events():
+        if (event.type == "run_item_stream_event"
+                and event.item.type == "tool_call_item"):
+            # Text written before a tool call is commentary, not the report
+            buffer = ""
+        elif (event.type == "raw_response_event"
+                and event.data.type == "response.output_text.delta"):
+            buffer += event.data.delta
+            # Everything before the latest heading is a finished section;
+            # "## " lines inside code blocks are not headings
+            while (match := next(_unfenced_matches(_SECTION_RE, buffer, 1), None)):
+                section, buffer = buffer[:match.start()], buffer[match.start():]
+                if section.strip():
+                    yield section
+    
+    if buffer.strip():
+        yield buffer
 
-async def run_research_process(topic: str):
-    """Run the complete research process."""
-    # Step 1: Initial Research
-    with st.spinner("Conducting comprehensive research..."):
-        research_result = await Runner.run(research_agent, topic)
-        initial_report = research_result.final_output
+def _condense_paragraphs(text: str) -> List[str]:
+    """
+    Keep the first paragraph whole; cut every later paragraph down to the
+    sentences that carry a citation, dropping uncited ones entirely.
+    """
+    paragraphs = text.strip().split('\n\n')
+    condensed = paragraphs[:1]
+    for paragraph in paragraphs[1:]:
+        lines = []
+        for line in paragraph.split('\n'):
+            cited = [
+                sentence for sentence in _SENTENCE_RE.split(line)
+                if _URL_RE.search(sentence)
+            ]
+            if cited:
+                lines.append(' '.join(cited))
+        if lines:
+            condensed.append('\n'.join(lines))
+    return condensed
+
+def _report_skeleton(report: str) -> str:
+    """
+    Reduce a markdown report to its headings, the first paragraph under each,
+    and the cited sentences of the rest. Fenced code is dropped first so its
+    "#" lines aren't taken for headings and no fence is left unbalanced.
+    """
+    kept, pos = [], 0
+    for start, end in _fenced_spans(report):
+        kept.append(report[pos:start])
+        pos = end
+    kept.append(report[pos:])
+    report = ''.join(kept)
     
-    # Display initial report in an expander
-    with st.expander("View Initial Research Report"):
-        st.markdown(initial_report)
+    headings = list(_HEADING_RE.finditer(report))
+    if not headings:
+        return '\n\n'.join(_condense_paragraphs(report))
     
-    # Step 2: Enhance the report
-    with st.spinner("Enhancing the report with additional information..."):
-        elaboration_input = f"""
+    parts = _condense_paragraphs(report[:headings[0].start()])
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(report)
+        parts.append(heading.group(0))
+        parts.extend(_condense_paragraphs(report[heading.end():end]))
+    
+    return '\n\n'.join(part for part in parts if part)
+
+def _elaboration_input(topic: str, section: str) -> str:
+    # Long sections only need their outline for the agent to expand on
+    if len(section) > ELABORATION_SKELETON_THRESHOLD:
+        section = _report_skeleton(section)
+    
+    return f"""
         RESEARCH TOPIC: {topic}
         
-        INITIAL RESEARCH REPORT:
-        {initial_report}
+        SECTION OF THE INITIAL RESEARCH REPORT:
+        {section}
         
-        Please enhance this research report with additional information, examples, case studies, 
-        and deeper insights while maintaining its academic rigor and factual accuracy.
+        Please enhance this section of the research report with additional information, examples, case studies, 
+        and deeper insights while maintaining its academic rigor and factual accuracy. Keep the section's
+        heading and every fact and citation already in it, and do not add a report title, introduction
+        or conclusion of your own.
         """
-        
-        elaboration_result = await Runner.run(elaboration_agent, elaboration_input)
-        enhanced_report = elaboration_result.final_output
+
+async def run_research_process(topic: str) -> AsyncIterator[str]:
+    """Run the complete research process, yielding the enhanced report as it streams."""
+    research_agent, elaboration_agent = get_agents()
     
-    return enhanced_report
+    # Bound parallel elaboration runs so long reports don't hit rate limits
+    elaboration_sem = asyncio.Semaphore(ELABORATION_CONCURRENCY)
+    
+    async def _elaborate(section: str, queue: asyncio.Queue):
+        try:
+            async with elaboration_sem:
+                result = Runner.run_streamed(
+                    elaboration_agent, _elaboration_input(topic, section)
+                )
+                async for event in result.stream_events():
+                    if (event.type == "raw_response_event"
+                            and event.data.type == "response.output_text.delta"):
+                        await queue.put(event.data.delta)
+        finally:
+            # Always unblock the reader, even if this section failed
+            await queue.put(None)
+    
+    # Step 1: Initial Research, handing each finished section straight to
+    # the elaboration agent instead of waiting for the whole report
+    elaborations = []
+    try:
+        st.session_state._run_crawls = {}
+        with st.spinner("Conducting comprehensive research..."):
+            # Display initial report in an expander as it is written
+            with st.expander("View Initial Research Report"):
+                initial_placeholder = st.empty()
+            
+            research_result = Runner.run_streamed(research_agent, topic)
+            initial_report = ""
+            async for section in _stream_report_sections(research_result):
+                initial_report += section
+                initial_placeholder.markdown(initial_report)
+                queue = asyncio.Queue()
+                task = asyncio.create_task(_elaborate(section, queue))
+                elaborations.append((queue, task))
+        
+        # Release this run's crawled pages; the TTL cache still holds successes
+        st.session_state._run_crawls = {}
+        
+        # Step 2: Stream the enhanced sections back in report order
+        st.markdown("## Enhanced Research Report")
+        for i, (queue, task) in enumerate(elaborations):
+            if i:
+                yield "\n\n"
+            while (delta := await queue.get()) is not None:
+                yield delta
+            # Surface any error raised while enhancing this section
+            await task
+    finally:
+        # Stop enhancing sections nobody will read
+        for _, task in elaborations:
+            task.cancel()
 
 # Main research process
 button_disabled = not (openai_api_key and research_topic)
@@ -306,18 +958,14 @@ if st.button("Start Research", disabled=button_disabled):
         st.warning("Please enter a research topic.")
     else:
         try:
-            # Create placeholder for the final report
-            report_placeholder = st.empty()
-            
-            # Run the research process
-            enhanced_report = asyncio.run(run_research_process(research_topic))
-            
-            # Display the enhanced report
-            report_placeholder.markdown("## Enhanced Research Report")
-            report_placeholder.markdown(enhanced_report)
+            # Run the research process, rendering the enhanced report as it
+            # streams in; write_stream also returns the full text
+            enhanced_report = st.write_stream(
+                iter_in_session_loop(run_research_process(research_topic))
+            )
             
             # Add download button
-            filename = f"{research_topic.replace(' ', '_')}_report.md"
+            filename = f"{research_topic.translate(_FILENAME_TABLE)[:80]}_report.md"
             st.download_button(
                 "Download Report",
                 enhanced_report,